@@ -0,0 +1,70 @@
+"""Benchmark ingest dedup: hashing + MinHash + LSH throughput and index memory"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from dedup_service import MinHashLSH, content_hash, minhash_signature
+
+def make_posts(n: int, seed: int = 0):
+    """Synthetic posts where ~5% are exact repeats and ~10% are near-duplicates"""
+    rng = random.Random(seed)
+    vocab = [f"word{i}" for i in range(20000)]
+    posts = []
+    for i in range(n):
+        roll = rng.random()
+        if posts and roll < 0.05:
+            posts.append(rng.choice(posts))
+        elif posts and roll < 0.15:
+            words = rng.choice(posts).split()
+            words[rng.randrange(len(words))] = rng.choice(vocab)
+            posts.append(' '.join(words))
+        else:
+            posts.append(' '.join(rng.choices(vocab, k=40)))
+    return posts
+
+def ingest(posts):
+    """Dedup posts the way analyze_topic does; returns (index, exact, near)"""
+    index = MinHashLSH()
+    seen_hashes = set()
+    exact = near = 0
+    for post_id, text in enumerate(posts):
+        text_hash = content_hash(text)
+        if text_hash in seen_hashes:
+            exact += 1
+            continue
+        signature = minhash_signature(text)
+        if index.query(signature) is not None:
+            near += 1
+            continue
+        seen_hashes.add(text_hash)
+        index.add(signature, post_id)
+    return index, exact, near
+
+def run(n: int):
+    print(f"Generating {n} posts...")
+    posts = make_posts(n)
+
+    start = time.perf_counter()
+    index, exact, near = ingest(posts)
+    elapsed = time.perf_counter() - start
+    indexed = len(index)
+    print(f"posts:            {n}")
+    print(f"exact duplicates: {exact}")
+    print(f"near duplicates:  {near}")
+    print(f"indexed:          {indexed}")
+    print(f"throughput:       {n / elapsed:,.0f} posts/s ({elapsed:.1f}s)")
+    print(f"LSH arrays:       {index.nbytes() / 1e6:.1f} MB ({index.nbytes() / max(indexed, 1):.0f} B/post, merged only)")
+    del index
+
+    # tracemalloc slows allocation-heavy code a lot, so measure memory in a separate pass
+    tracemalloc.start()
+    index, _, _ = ingest(posts)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"traced memory:    {current / 1e6:.1f} MB current, {peak / 1e6:.1f} MB peak (includes hash set)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=1_000_000, help="number of posts")
+    run(parser.parse_args().n)
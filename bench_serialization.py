@@ -0,0 +1,80 @@
+"""Benchmark response serialization: Pydantic/FastAPI default path vs orjson fast path"""
+import gzip
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.utils import create_response_field
+
+from schemas import RedditPostResponse, TopicAnalysisResponse
+from serialization import post_to_dict
+
+SIZES = [1_000, 10_000]
+REPEAT = 3
+
+def make_rows(n: int):
+    """Build fake ORM-like rows shaped like reddit_posts"""
+    now = datetime.now()
+    sentiments = ["Positive", "Negative", "Neutral"]
+    emotions = ["Joy", "Anger", "Sadness", "Fear", "Surprise", "Neutral"]
+    return [
+        SimpleNamespace(
+            id=i,
+            topic="benchmark",
+            post_text=f"Post {i} about benchmark topic with some typical body text. " * 8,
+            sentiment=sentiments[i % 3],
+            emotion=emotions[i % 6],
+            created_at=now - timedelta(minutes=i),
+        )
+        for i in range(n)
+    ]
+
+# The same response field FastAPI builds for response_model=TopicAnalysisResponse
+RESPONSE_FIELD = create_response_field(
+    name="response_analyze_topic", type_=TopicAnalysisResponse, mode="serialization"
+)
+
+def default_path(rows) -> bytes:
+    """
+    What the route did before: build models, then FastAPI's serialize_response
+    (field.validate + field.serialize) and JSONResponse rendering.
+    """
+    response = TopicAnalysisResponse(
+        topic="benchmark",
+        total_posts=len(rows),
+        posts=[RedditPostResponse.model_validate(row) for row in rows],
+        sentiment_distribution={},
+        emotion_distribution={},
+    )
+    value, errors = RESPONSE_FIELD.validate(response, {}, loc=("response",))
+    assert not errors
+    return JSONResponse(RESPONSE_FIELD.serialize(value, by_alias=True)).body
+
+def fast_path(rows) -> bytes:
+    """Plain dicts from trusted rows, encoded by ORJSONResponse"""
+    return ORJSONResponse({
+        "topic": "benchmark",
+        "total_posts": len(rows),
+        "posts": [post_to_dict(row) for row in rows],
+        "sentiment_distribution": {},
+        "emotion_distribution": {},
+    }).body
+
+def best_time(fn, rows):
+    best = float("inf")
+    body = b""
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        body = fn(rows)
+        best = min(best, time.perf_counter() - start)
+    return best, body
+
+if __name__ == "__main__":
+    print(f"{'posts':>7} {'path':>8} {'time (ms)':>10} {'bytes':>11} {'gzip bytes':>11}")
+    for n in SIZES:
+        rows = make_rows(n)
+        for name, fn in (("default", default_path), ("orjson", fast_path)):
+            elapsed, body = best_time(fn, rows)
+            gz = len(gzip.compress(body))
+            print(f"{n:>7} {name:>8} {elapsed * 1000:>10.1f} {len(body):>11} {gz:>11}")
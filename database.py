@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -35,4 +35,25 @@ def get_db():
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+
+def _add_missing_columns():
+    """
+    create_all() never alters existing tables, so add any nullable columns
+    introduced since the table was first created.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            added = set()
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'))
+                added.add(column.name)
+            for index in table.indexes:
+                if any(c.name in added for c in index.columns):
+                    index.create(bind=conn, checkfirst=True)
 
@@ -0,0 +1,243 @@
+import hashlib
+import os
+import re
+import string
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models import RedditPost
+
+# MinHash/LSH parameters. 32 permutations split into 8 bands of 4 rows puts
+# the LSH candidate threshold near Jaccard 0.6; candidates are then checked
+# against NEAR_DUPLICATE_THRESHOLD using the full signature.
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+# Cap on signatures held across all topic indexes in one process (~232 B
+# each). Least recently used topics are evicted past it, and a topic's index
+# only loads its most recent posts (half the cap, to leave room to grow).
+MAX_INDEXED_POSTS = int(os.getenv("DEDUP_INDEX_MAX_POSTS", "500000"))
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Fixed seed: signatures are stored in the database, so the permutations
+# must be identical across processes and restarts.
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=NUM_PERM).astype(np.uint64)
+_BAND_MIX = (_rng.randint(1, 1 << 31, size=ROWS).astype(np.uint64) << np.uint64(32)) | np.uint64(1)
+_BAND_SALT = _rng.randint(0, 1 << 62, size=BANDS, dtype=np.int64).astype(np.uint64)
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop URLs and punctuation, and collapse whitespace"""
+    text = text.lower()
+    text = re.sub(r'http\S+|www\S+|https\S+', '', text)
+    text = text.translate(str.maketrans('', '', string.punctuation))
+    return ' '.join(text.split())
+
+def content_hash(text: str) -> str:
+    """Hash of the normalized text, used for exact duplicate detection"""
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+def minhash_signature(text: str) -> np.ndarray:
+    """MinHash signature over word shingles of the normalized text"""
+    tokens = normalize_text(text).split()
+    if len(tokens) >= SHINGLE_SIZE:
+        shingles = {' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+    else:
+        shingles = {' '.join(tokens)}
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64)
+    permuted = (np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=1).astype(np.uint32)
+
+def _band_keys_many(signatures: np.ndarray) -> np.ndarray:
+    """
+    One 64-bit bucket key per LSH band for each signature, shape (n, BANDS).
+    The band number is mixed in so all bands can share a single key array.
+    """
+    bands = signatures.astype(np.uint64).reshape(len(signatures), BANDS, ROWS)
+    return (bands * _BAND_MIX).sum(axis=2) ^ _BAND_SALT
+
+def _band_keys(signature: np.ndarray) -> np.ndarray:
+    """Band keys for a single signature"""
+    return _band_keys_many(signature.reshape(1, NUM_PERM))[0]
+
+class MinHashLSH:
+    """
+    In-memory LSH index over MinHash signatures.
+
+    Band keys live in one sorted numpy array searched with searchsorted, with
+    recent additions held in a dict until they are merged in. This keeps
+    memory at roughly 230 bytes per post instead of a Python object per bucket.
+    """
+
+    def __init__(self, merge_threshold: int = 10000):
+        self.merge_threshold = merge_threshold
+        self.signatures = np.empty((0, NUM_PERM), dtype=np.uint32)
+        self.post_ids = np.empty(0, dtype=np.int64)
+        self._keys = np.empty(0, dtype=np.uint64)
+        self._slots = np.empty(0, dtype=np.int32)
+        self._pending: Dict[int, List[int]] = {}
+        self._pending_signatures: List[np.ndarray] = []
+        self._pending_ids: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.post_ids) + len(self._pending_ids)
+
+    def _signature_at(self, slot: int) -> np.ndarray:
+        if slot < len(self.post_ids):
+            return self.signatures[slot]
+        return self._pending_signatures[slot - len(self.post_ids)]
+
+    def _post_id_at(self, slot: int) -> int:
+        if slot < len(self.post_ids):
+            return int(self.post_ids[slot])
+        return self._pending_ids[slot - len(self.post_ids)]
+
+    def add(self, signature: np.ndarray, post_id: int):
+        slot = len(self)
+        for key in _band_keys(signature).tolist():
+            self._pending.setdefault(key, []).append(slot)
+        self._pending_signatures.append(signature)
+        self._pending_ids.append(post_id)
+        if len(self._pending_ids) >= self.merge_threshold:
+            self._merge()
+
+    def extend(self, signatures: np.ndarray, post_ids: np.ndarray):
+        """Bulk add, sorting the keys once; much faster than add() per row"""
+        if self._pending_ids:
+            self._merge()
+        first_slot = len(self.post_ids)
+        keys = np.concatenate([self._keys, _band_keys_many(signatures).ravel()])
+        slots = np.concatenate([
+            self._slots,
+            np.repeat(np.arange(first_slot, first_slot + len(post_ids), dtype=np.int32), BANDS),
+        ])
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._slots = slots[order]
+        self.signatures = np.vstack([self.signatures, signatures])
+        self.post_ids = np.concatenate([self.post_ids, post_ids.astype(np.int64)])
+
+    def _merge(self):
+        """Fold pending additions into the sorted key array"""
+        new_keys = np.fromiter(
+            (key for key, slots in self._pending.items() for _ in slots), dtype=np.uint64
+        )
+        new_slots = np.fromiter(
+            (slot for slots in self._pending.values() for slot in slots), dtype=np.int32
+        )
+        keys = np.concatenate([self._keys, new_keys])
+        slots = np.concatenate([self._slots, new_slots])
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._slots = slots[order]
+        self.signatures = np.vstack([self.signatures] + self._pending_signatures)
+        self.post_ids = np.concatenate([self.post_ids, np.array(self._pending_ids, dtype=np.int64)])
+        self._pending = {}
+        self._pending_signatures = []
+        self._pending_ids = []
+
+    def query(self, signature: np.ndarray) -> Optional[int]:
+        """Post id of the most similar indexed post at or above the threshold, if any"""
+        band_keys = _band_keys(signature)
+        lo = self._keys.searchsorted(band_keys, side="left")
+        hi = self._keys.searchsorted(band_keys, side="right")
+
+        candidates = set()
+        for start, end in zip(lo[lo < hi].tolist(), hi[lo < hi].tolist()):
+            candidates.update(self._slots[start:end].tolist())
+        if self._pending:
+            for key in band_keys.tolist():
+                candidates.update(self._pending.get(key, ()))
+
+        best_slot, best_score = None, NEAR_DUPLICATE_THRESHOLD
+        for slot in candidates:
+            score = float(np.mean(self._signature_at(slot) == signature))
+            if score >= best_score:
+                best_slot, best_score = slot, score
+        return None if best_slot is None else self._post_id_at(best_slot)
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the numpy arrays (merged entries only)"""
+        return self.signatures.nbytes + self.post_ids.nbytes + self._keys.nbytes + self._slots.nbytes
+
+class TopicIndex:
+    """A topic's LSH index plus the highest post id loaded into it"""
+
+    def __init__(self):
+        self.lsh = MinHashLSH()
+        self.last_id = 0
+
+    def query(self, signature: np.ndarray) -> Optional[int]:
+        return self.lsh.query(signature)
+
+    def add(self, signature: np.ndarray, post_id: int):
+        self.lsh.add(signature, post_id)
+        self.last_id = max(self.last_id, post_id)
+
+    def _load(self, rows):
+        if not rows:
+            return
+        signatures = np.frombuffer(b"".join(bytes(minhash) for _, minhash in rows), dtype=np.uint32)
+        post_ids = np.array([post_id for post_id, _ in rows], dtype=np.int64)
+        self.lsh.extend(signatures.reshape(len(rows), NUM_PERM), post_ids)
+        self.last_id = max(self.last_id, int(post_ids.max()))
+
+_indexes: "OrderedDict[str, TopicIndex]" = OrderedDict()
+
+def get_topic_index(db: Session, topic: str) -> TopicIndex:
+    """
+    Near-duplicate index for a topic. Built from the most recent stored
+    signatures on first use, then topped up with rows added since (including
+    by other workers). Call once per request and add() new posts to it.
+    """
+    index = _indexes.pop(topic, None)
+    signed = select(RedditPost.id, RedditPost.minhash).where(
+        RedditPost.topic == topic, RedditPost.minhash.isnot(None)
+    )
+    if index is None or len(index.lsh) > MAX_INDEXED_POSTS:
+        # (Re)build from the newest posts only, which bounds memory and the
+        # time the first request for a large topic spends loading. Loading
+        # half the cap leaves headroom, so a topic at the cap is rebuilt once
+        # per MAX_INDEXED_POSTS // 2 new posts rather than on every request.
+        index = TopicIndex()
+        rows = db.execute(signed.order_by(RedditPost.id.desc()).limit(max(1, MAX_INDEXED_POSTS // 2))).all()
+        index._load(rows[::-1])
+    else:
+        index._load(db.execute(signed.where(RedditPost.id > index.last_id).order_by(RedditPost.id)).all())
+
+    # Most recently used last; evict from the front until under the cap
+    _indexes[topic] = index
+    total = sum(len(i.lsh) for i in _indexes.values())
+    while total > MAX_INDEXED_POSTS and len(_indexes) > 1:
+        _, evicted = _indexes.popitem(last=False)
+        total -= len(evicted.lsh)
+    return index
+
+def find_exact_duplicates(db: Session, topic: str, reddit_ids: List[str], hashes: List[str]) -> Dict[str, RedditPost]:
+    """
+    Stored posts for this topic matching any of the given Reddit ids or
+    content hashes, keyed by both.
+    """
+    reddit_ids = [rid for rid in reddit_ids if rid]
+    matches = db.query(RedditPost).filter(
+        RedditPost.topic == topic,
+        RedditPost.reddit_id.in_(reddit_ids) | RedditPost.content_hash.in_(hashes)
+    ).all()
+    found = {}
+    for post in matches:
+        if post.reddit_id:
+            found[post.reddit_id] = post
+        if post.content_hash:
+            found[post.content_hash] = post
+    return found
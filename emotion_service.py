@@ -1,4 +1,19 @@
 import os
+from typing import List, Tuple
+
+EMOTION_MODEL_NAME = "j-hartmann/emotion-english-distilroberta-base"
+HF_MODEL_VERSION = f"hf:{EMOTION_MODEL_NAME}"
+KEYWORD_MODEL_VERSION = "keyword-v1"
+
+# Map model labels to our emotion categories
+EMOTION_MAPPING = {
+    'joy': 'Joy',
+    'anger': 'Anger',
+    'sadness': 'Sadness',
+    'fear': 'Fear',
+    'surprise': 'Surprise',
+    'neutral': 'Neutral'
+}
 
 # Lazy import to avoid breaking server startup
 emotion_classifier = None
@@ -40,7 +55,7 @@ def get_emotion_classifier():
             print("Loading emotion classification model (this may take a minute on first run)...")
             emotion_classifier = pipeline(
                 "text-classification",
-                model="j-hartmann/emotion-english-distilroberta-base",
+                model=EMOTION_MODEL_NAME,
                 device=0 if torch.cuda.is_available() else -1,
                 return_all_scores=False
             )
@@ -72,19 +87,9 @@ def detect_emotion(text: str) -> str:
         if result and len(result) > 0:
             emotion_label = result[0]['label']
             
-            # Map model labels to our emotion categories
-            emotion_mapping = {
-                'joy': 'Joy',
-                'anger': 'Anger',
-                'sadness': 'Sadness',
-                'fear': 'Fear',
-                'surprise': 'Surprise',
-                'neutral': 'Neutral'
-            }
-            
             # Handle case-insensitive mapping
             emotion_lower = emotion_label.lower()
-            return emotion_mapping.get(emotion_lower, 'Neutral')
+            return EMOTION_MAPPING.get(emotion_lower, 'Neutral')
         else:
             return "Neutral"
     except Exception as e:
@@ -92,6 +97,39 @@ def detect_emotion(text: str) -> str:
         # Fallback to simple detection
         return detect_emotion_simple(text)
 
+def detect_emotions(texts: List[str], batch_size: int = 32) -> Tuple[List[str], str]:
+    """
+    Batch version of detect_emotion. Runs the HuggingFace pipeline over the
+    whole list at once instead of one call per text.
+    Returns the labels and the version of the model that actually produced
+    them, which is the keyword fallback if the pipeline is off or fails.
+    """
+    classifier = get_emotion_classifier()
+    if classifier is None:
+        return [detect_emotion_simple(text) if text and text.strip() else "Neutral" for text in texts], KEYWORD_MODEL_VERSION
+    
+    emotions = ["Neutral"] * len(texts)
+    indexed = [(i, text[:512]) for i, text in enumerate(texts) if text and text.strip()]
+    if not indexed:
+        return emotions, HF_MODEL_VERSION
+    
+    try:
+        results = classifier([text for _, text in indexed], top_k=1, batch_size=batch_size)
+        for (i, _), result in zip(indexed, results):
+            # top_k=1 yields a one-element list per input
+            top = result[0] if isinstance(result, list) else result
+            emotions[i] = EMOTION_MAPPING.get(top['label'].lower(), 'Neutral')
+        return emotions, HF_MODEL_VERSION
+    except Exception as e:
+        print(f"Error in batch emotion detection: {e}")
+        return [detect_emotion_simple(text) if text and text.strip() else "Neutral" for text in texts], KEYWORD_MODEL_VERSION
+
+def get_emotion_model_version() -> str:
+    """Identifier for the emotion model currently in use"""
+    if get_emotion_classifier() is None:
+        return KEYWORD_MODEL_VERSION
+    return HF_MODEL_VERSION
+
 def detect_emotion_simple(text: str) -> str:
     """Simple keyword-based emotion detection as fallback"""
     text_lower = text.lower()
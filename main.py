@@ -1,6 +1,7 @@
 import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 from database import init_db
 from models import RedditPost
@@ -27,6 +28,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large analysis responses; small ones aren't worth the CPU
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=int(os.getenv("GZIP_MIN_SIZE", "1000")),
+)
+
 @app.on_event("startup")
 def startup_event():
     init_db()
@@ -1,14 +1,34 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Date, Text, LargeBinary, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from database import Base
 
 class RedditPost(Base):
     __tablename__ = "reddit_posts"
+    __table_args__ = (
+        # Exact dedup at ingest: the same submission or text is stored once per topic
+        Index("uq_reddit_posts_topic_reddit_id", "topic", "reddit_id", unique=True),
+        Index("uq_reddit_posts_topic_content_hash", "topic", "content_hash", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     topic = Column(String, index=True)
     post_text = Column(Text)
     sentiment = Column(String)
     emotion = Column(String)
+    model_version = Column(String, index=True)
+    reddit_id = Column(String)
+    content_hash = Column(String)
+    minhash = Column(LargeBinary)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+class TopicTermCount(Base):
+    """Per-day count of posts containing a term (unigram or bigram) for a topic"""
+    __tablename__ = "topic_term_counts"
+    __table_args__ = (UniqueConstraint("topic", "day", "term", name="uq_topic_day_term"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    topic = Column(String, nullable=False, index=True)
+    day = Column(Date, nullable=False, index=True)
+    term = Column(String, nullable=False, index=True)
+    count = Column(Integer, nullable=False, default=0)
+    negative_count = Column(Integer, nullable=False, default=0)
@@ -164,6 +164,7 @@ def fetch_reddit_posts(topic: str, limit: int = 10) -> List[dict]:
             # Search across all subreddits
             for submission in reddit.subreddit("all").search(topic, limit=limit, sort='relevance'):
                 post_data = {
+                    'id': submission.id,
                     'title': submission.title,
                     'text': submission.selftext if hasattr(submission, 'selftext') else '',
                     'url': submission.url,
@@ -178,6 +179,7 @@ def fetch_reddit_posts(topic: str, limit: int = 10) -> List[dict]:
                 for submission in reddit.subreddit("all").hot(limit=limit * 2):
                     if topic.lower() in submission.title.lower() or topic.lower() in (submission.selftext or "").lower():
                         post_data = {
+                            'id': submission.id,
                             'title': submission.title,
                             'text': submission.selftext if hasattr(submission, 'selftext') else '',
                             'url': submission.url,
@@ -0,0 +1,292 @@
+"""
+Re-score stored reddit_posts with the current sentiment/emotion models.
+
+Run after enabling USE_HF_EMOTION_MODEL or changing SENTIMENT_THRESHOLD so
+historical labels match new ones:
+
+    python rescore.py --workers 4 --chunk-size 2000
+
+Rows are streamed in id order and written back in bulk one chunk at a time,
+so memory stays flat regardless of table size. Progress is checkpointed after
+every chunk; rerunning the same command resumes where it stopped. The
+checkpoint is removed once a run completes.
+
+Rows stored before ingest dedup existed have no content hash or MinHash
+signature, so the duplicate checks cannot see them. Fill those in with:
+
+    python rescore.py --backfill-dedup
+
+Term counts behind /api/analysis/terms record each post's sentiment at the
+time it was counted. After re-scoring, or to include posts stored before
+term counting existed, rebuild them from the stored posts with:
+
+    python rescore.py --rebuild-terms
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.orm import Session
+
+from database import engine, init_db
+from dedup_service import content_hash, minhash_signature
+from models import RedditPost, TopicTermCount
+from emotion_service import detect_emotions
+from scoring import get_model_version, model_version_for
+from sentiment_service import analyze_sentiments
+from term_service import update_term_counts
+
+DEFAULT_CHECKPOINT = ".rescore_checkpoint.json"
+
+def load_checkpoint(path: str, run_key: dict) -> int:
+    """Return the last processed id for a run with the same key, or 0"""
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("run") != run_key:
+        print(f"Checkpoint is for a different run ({checkpoint.get('run')}), starting over")
+        return 0
+    return checkpoint.get("last_id", 0)
+
+def save_checkpoint(path: str, run_key: dict, last_id: int, rows_done: int):
+    """Write the checkpoint atomically so a crash never leaves it half-written"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"run": run_key, "last_id": last_id, "rows_done": rows_done}, f)
+    os.replace(tmp_path, path)
+
+def iter_chunks(stmt, chunk_size: int, after_id: int):
+    """
+    Yield lists of rows selected by `stmt` with id > after_id, in id order.
+
+    Uses a server-side cursor where the driver supports one (psycopg2).
+    SQLite has none, and an open read there would block our writes, so it is
+    paged by id instead.
+    """
+    if engine.dialect.supports_server_side_cursors:
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(
+                stmt.where(RedditPost.id > after_id)
+            )
+            for partition in result.partitions():
+                yield partition
+        return
+
+    while True:
+        with engine.connect() as conn:
+            rows = conn.execute(stmt.where(RedditPost.id > after_id).limit(chunk_size)).all()
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1].id
+
+def split(items: list, parts: int) -> list:
+    """Split items into at most `parts` contiguous, similarly sized batches"""
+    size = max(1, -(-len(items) // parts))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def rescore(chunk_size: int, workers: int, checkpoint_path: str, topic: str = None,
+            rescore_all: bool = False, reset: bool = False):
+    init_db()
+
+    # Emotion scoring (and the HF model, if enabled) stays in this process;
+    # the pool only runs TextBlob, so workers never touch CUDA.
+    model_version = get_model_version()
+    print(f"Re-scoring with model version: {model_version}")
+
+    # Everything that changes which rows are selected; a checkpoint from a
+    # run with different options must not be resumed
+    run_key = {"model_version": model_version, "topic": topic, "all": rescore_all}
+    after_id = 0 if reset else load_checkpoint(checkpoint_path, run_key)
+    if after_id:
+        print(f"Resuming after id {after_id}")
+
+    stmt = select(RedditPost.id, RedditPost.post_text).order_by(RedditPost.id)
+    if topic:
+        stmt = stmt.where(RedditPost.topic == topic)
+    if not rescore_all:
+        stmt = stmt.where(or_(RedditPost.model_version.is_(None),
+                              RedditPost.model_version != model_version))
+
+    rows_done = 0
+    start = time.perf_counter()
+    # spawn rather than fork: forking a process that holds a CUDA context or
+    # torch threads is unsafe even if the children never use them
+    with multiprocessing.get_context("spawn").Pool(processes=workers) as pool:
+        for rows in iter_chunks(stmt, chunk_size, after_id):
+            texts = [row.post_text or "" for row in rows]
+            pending_sentiments = pool.map_async(analyze_sentiments, split(texts, workers))
+            emotions, emotion_version = detect_emotions(texts)
+            sentiments = [label for batch in pending_sentiments.get() for label in batch]
+
+            # Tag rows with the model that actually scored them, so a chunk that
+            # fell back to keywords stays stale and is picked up by the next run
+            chunk_version = model_version_for(emotion_version)
+            if chunk_version != model_version:
+                print(f"Warning: chunk scored with '{chunk_version}' instead of '{model_version}'")
+
+            params = [
+                {"id": row.id, "sentiment": sentiment, "emotion": emotion, "model_version": chunk_version}
+                for row, sentiment, emotion in zip(rows, sentiments, emotions)
+            ]
+            with Session(engine) as session:
+                session.execute(update(RedditPost), params)
+                session.commit()
+
+            after_id = rows[-1].id
+            rows_done += len(rows)
+            save_checkpoint(checkpoint_path, run_key, after_id, rows_done)
+            elapsed = time.perf_counter() - start
+            print(f"Re-scored {rows_done} rows (last id {after_id}, {rows_done / elapsed:.0f} rows/s)")
+
+    # The run is complete, so the next one must start from the beginning
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    print(f"Done. {rows_done} rows re-scored.")
+    if rows_done:
+        print("Run 'python rescore.py --rebuild-terms' so term counts pick up the new sentiments.")
+
+def dedup_keys(texts: list) -> list:
+    """(content_hash, minhash bytes) per text; runs in the pool workers"""
+    return [(content_hash(text), minhash_signature(text).tobytes()) for text in texts]
+
+def backfill_dedup(chunk_size: int, workers: int, topic: str = None):
+    """
+    Compute content_hash and minhash for rows stored before ingest dedup.
+
+    Only rows without a signature are selected, so an interrupted run simply
+    continues on the next invocation. Where older rows already duplicate each
+    other, the earliest keeps the hash and later copies are left without one
+    so the unique (topic, content_hash) index holds.
+    """
+    init_db()
+
+    stmt = (
+        select(RedditPost.id, RedditPost.topic, RedditPost.post_text)
+        .where(RedditPost.minhash.is_(None))
+        .order_by(RedditPost.id)
+    )
+    if topic:
+        stmt = stmt.where(RedditPost.topic == topic)
+
+    rows_done = 0
+    start = time.perf_counter()
+    with multiprocessing.get_context("spawn").Pool(processes=workers) as pool:
+        for rows in iter_chunks(stmt, chunk_size, 0):
+            texts = [row.post_text or "" for row in rows]
+            keys = [key for batch in pool.map(dedup_keys, split(texts, workers)) for key in batch]
+
+            with Session(engine) as session:
+                hashes = {text_hash for text_hash, _ in keys}
+                taken = set(session.execute(
+                    select(RedditPost.topic, RedditPost.content_hash)
+                    .where(RedditPost.content_hash.in_(hashes))
+                ).all())
+
+                params = []
+                for row, (text_hash, minhash) in zip(rows, keys):
+                    if (row.topic, text_hash) in taken:
+                        text_hash = None
+                    else:
+                        taken.add((row.topic, text_hash))
+                    params.append({"id": row.id, "content_hash": text_hash, "minhash": minhash})
+                session.execute(update(RedditPost), params)
+                session.commit()
+
+            rows_done += len(rows)
+            elapsed = time.perf_counter() - start
+            print(f"Backfilled {rows_done} rows (last id {rows[-1].id}, {rows_done / elapsed:.0f} rows/s)")
+
+    print(f"Done. {rows_done} rows backfilled. Restart the API so its near-duplicate indexes reload.")
+
+def preprocess_texts(texts: list) -> list:
+    """preprocess_text per text; runs in the pool workers"""
+    # Imported here so the other modes don't need the NLTK data
+    from preprocessing import preprocess_text
+    return [preprocess_text(text) for text in texts]
+
+def rebuild_terms(chunk_size: int, workers: int, topic: str = None):
+    """
+    Recompute topic_term_counts from stored posts and their current sentiment.
+
+    Each topic is rebuilt in one transaction (delete, then re-count chunk by
+    chunk), so /terms never sees a half-rebuilt topic and an interrupted run
+    leaves the old counts in place.
+    """
+    init_db()
+
+    if topic:
+        topics = [topic]
+    else:
+        with engine.connect() as conn:
+            topics = conn.execute(select(RedditPost.topic).distinct()).scalars().all()
+
+    stmt = (
+        select(RedditPost.id, RedditPost.post_text, RedditPost.sentiment, RedditPost.created_at)
+        .order_by(RedditPost.id)
+        .limit(chunk_size)
+    )
+    start = time.perf_counter()
+    with multiprocessing.get_context("spawn").Pool(processes=workers) as pool:
+        for topic_name in topics:
+            rows_done = 0
+            with Session(engine) as session:
+                session.execute(delete(TopicTermCount).where(TopicTermCount.topic == topic_name))
+                # Page by id inside the write transaction; a second connection
+                # reading alongside it would contend for SQLite's lock
+                after_id = 0
+                while True:
+                    rows = session.execute(
+                        stmt.where(RedditPost.topic == topic_name, RedditPost.id > after_id)
+                    ).all()
+                    if not rows:
+                        break
+                    texts = [row.post_text or "" for row in rows]
+                    processed = [text for batch in pool.map(preprocess_texts, split(texts, workers)) for text in batch]
+                    update_term_counts(session, topic_name, [
+                        (row.created_at.date(), processed_text, row.sentiment or "")
+                        for row, processed_text in zip(rows, processed)
+                        if row.created_at is not None
+                    ])
+                    after_id = rows[-1].id
+                    rows_done += len(rows)
+                session.commit()
+            elapsed = time.perf_counter() - start
+            print(f"Rebuilt terms for '{topic_name}' from {rows_done} posts ({elapsed:.1f}s elapsed)")
+
+    print(f"Done. Term counts rebuilt for {len(topics)} topic(s).")
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score stored Reddit posts with the current models")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="rows fetched and written per chunk")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="scoring processes")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="checkpoint file path")
+    parser.add_argument("--topic", help="only process posts stored under exactly this topic")
+    parser.add_argument("--all", action="store_true", dest="rescore_all",
+                        help="also re-score rows already tagged with the current model version")
+    parser.add_argument("--reset", action="store_true", help="ignore any existing checkpoint")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--backfill-dedup", action="store_true",
+                      help="fill in dedup hashes/signatures for old rows instead of re-scoring")
+    mode.add_argument("--rebuild-terms", action="store_true",
+                      help="recompute term counts from stored posts instead of re-scoring")
+    args = parser.parse_args()
+
+    try:
+        if args.backfill_dedup:
+            backfill_dedup(args.chunk_size, args.workers, args.topic)
+        elif args.rebuild_terms:
+            rebuild_terms(args.chunk_size, args.workers, args.topic)
+        else:
+            rescore(args.chunk_size, args.workers, args.checkpoint, args.topic, args.rescore_all, args.reset)
+    except KeyboardInterrupt:
+        print("\nInterrupted. Rerun the same command to resume.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List
 from datetime import datetime, timedelta
@@ -11,12 +12,15 @@ from schemas import (
     TopicAnalysisResponse,
     RedditPostResponse,
     TrendResponse,
-    TrendDataPoint
+    TrendDataPoint,
+    TermStatsResponse
 )
 from reddit_service import fetch_reddit_posts
 from preprocessing import preprocess_text
-from sentiment_service import analyze_sentiment
-from emotion_service import detect_emotion
+from scoring import score_texts
+from term_service import update_term_counts, get_term_stats
+from dedup_service import content_hash, minhash_signature, find_exact_duplicates, get_topic_index
+from serialization import POST_COLUMNS, post_to_dict, rows_to_dicts, fast_json_response
 
 router = APIRouter(prefix="/api/analysis", tags=["analysis"])
 
@@ -36,47 +40,93 @@ async def analyze_topic(request: TopicAnalysisRequest, db: Session = Depends(get
         saved_posts = []
         sentiments = []
         emotions = []
+        seen_ids = set()
+        duplicate_posts = 0
+        
+        # Combine title and text for analysis
+        full_texts = [f"{post_data['title']} {post_data.get('text', '')}" for post_data in reddit_posts]
+        text_hashes = [content_hash(full_text) for full_text in full_texts]
+        
+        # Look up exact duplicates (same submission id or normalized text) in one query
+        known_posts = find_exact_duplicates(
+            db, request.topic, [post_data.get('id') for post_data in reddit_posts], text_hashes
+        )
+        topic_index = get_topic_index(db, request.topic)
         
         # Process each post
-        for post_data in reddit_posts:
-            # Combine title and text for analysis
-            full_text = f"{post_data['title']} {post_data.get('text', '')}"
+        for post_data, full_text, text_hash in zip(reddit_posts, full_texts, text_hashes):
+            reddit_id = post_data.get('id')
             
-            # Preprocess text
-            processed_text = preprocess_text(full_text)
+            existing = known_posts.get(reddit_id) or known_posts.get(text_hash)
+            if existing is None:
+                # Near-duplicates: reposts and crossposts with small text changes
+                signature = minhash_signature(full_text)
+                near_id = topic_index.query(signature)
+                if near_id is not None:
+                    existing = db.get(RedditPost, near_id)
             
-            # Analyze sentiment
-            sentiment = analyze_sentiment(full_text)
+            if existing is None:
+                # Preprocess text
+                processed_text = preprocess_text(full_text)
+                
+                # Analyze sentiment and detect emotion; the version reflects any fallback
+                [(sentiment, emotion)], model_version = score_texts([full_text])
+                
+                # Store in database
+                db_post = RedditPost(
+                    topic=request.topic,
+                    post_text=full_text[:5000],  # Limit text length
+                    sentiment=sentiment,
+                    emotion=emotion,
+                    model_version=model_version,
+                    reddit_id=reddit_id,
+                    content_hash=text_hash,
+                    minhash=signature.tobytes()
+                )
+                db.add(db_post)
+                try:
+                    db.flush()
+                except IntegrityError:
+                    # A concurrent request stored the same post first
+                    db.rollback()
+                    stored = find_exact_duplicates(db, request.topic, [reddit_id], [text_hash])
+                    existing = stored.get(reddit_id) or stored[text_hash]
+                else:
+                    # Count the post's terms in the same transaction as the post, so a
+                    # failure never leaves a stored post that dedup will skip uncounted
+                    db.refresh(db_post)
+                    update_term_counts(db, request.topic, [(db_post.created_at.date(), processed_text, sentiment)])
+                    db.commit()
+                    topic_index.add(signature, db_post.id)
+                    known_posts[text_hash] = db_post
+                    if reddit_id:
+                        known_posts[reddit_id] = db_post
             
-            # Detect emotion
-            emotion = detect_emotion(full_text)
+            if existing is not None:
+                # Duplicates skip the NLP stages and reuse the stored result
+                duplicate_posts += 1
+                db_post = existing
             
-            # Store in database
-            db_post = RedditPost(
-                topic=request.topic,
-                post_text=full_text[:5000],  # Limit text length
-                sentiment=sentiment,
-                emotion=emotion
-            )
-            db.add(db_post)
-            db.commit()
-            db.refresh(db_post)
-            
-            saved_posts.append(RedditPostResponse.model_validate(db_post))
-            sentiments.append(sentiment)
-            emotions.append(emotion)
+            if db_post.id in seen_ids:
+                continue
+            seen_ids.add(db_post.id)
+            saved_posts.append(post_to_dict(db_post))
+            sentiments.append(db_post.sentiment)
+            emotions.append(db_post.emotion)
         
         # Calculate distributions
         sentiment_distribution = dict(Counter(sentiments))
         emotion_distribution = dict(Counter(emotions))
         
-        return TopicAnalysisResponse(
-            topic=request.topic,
-            total_posts=len(saved_posts),
-            posts=saved_posts,
-            sentiment_distribution=sentiment_distribution,
-            emotion_distribution=emotion_distribution
-        )
+        # Rows come straight from our own DB, so skip per-post model validation
+        return fast_json_response({
+            "topic": request.topic,
+            "total_posts": len(saved_posts),
+            "posts": saved_posts,
+            "sentiment_distribution": sentiment_distribution,
+            "emotion_distribution": emotion_distribution,
+            "duplicate_posts": duplicate_posts
+        })
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing topic: {str(e)}")
@@ -87,14 +137,15 @@ async def get_results(topic: str = None, limit: int = 50, db: Session = Depends(
     Fetch stored analysis results. Optionally filter by topic.
     """
     try:
-        query = db.query(RedditPost)
+        # Select plain columns so no ORM objects are built per row
+        query = db.query(*POST_COLUMNS)
         
         if topic:
             query = query.filter(RedditPost.topic.ilike(f"%{topic}%"))
         
         posts = query.order_by(RedditPost.created_at.desc()).limit(limit).all()
         
-        return [RedditPostResponse.model_validate(post) for post in posts]
+        return fast_json_response(rows_to_dicts(posts))
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching results: {str(e)}")
@@ -149,3 +200,14 @@ async def get_trends(topic: str, days: int = 7, db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching trends: {str(e)}")
 
+@router.get("/terms", response_model=TermStatsResponse)
+async def get_terms(topic: str, days: int = 7, limit: int = 20, db: Session = Depends(get_db)):
+    """
+    Get the top, rising and most negative-associated terms for a topic
+    over the specified number of days.
+    """
+    try:
+        return TermStatsResponse(**get_term_stats(db, topic, days, limit))
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching terms: {str(e)}")
@@ -28,6 +28,7 @@ class TopicAnalysisResponse(BaseModel):
     posts: List[RedditPostResponse]
     sentiment_distribution: dict
     emotion_distribution: dict
+    duplicate_posts: int = 0
 
 class TrendDataPoint(BaseModel):
     date: str
@@ -39,3 +40,14 @@ class TrendResponse(BaseModel):
     topic: str
     trend_data: List[TrendDataPoint]
 
+class TermScore(BaseModel):
+    term: str
+    count: int
+    score: float
+
+class TermStatsResponse(BaseModel):
+    topic: str
+    days: int
+    top_terms: List[TermScore]
+    rising_terms: List[TermScore]
+    negative_terms: List[TermScore]
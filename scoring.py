@@ -0,0 +1,23 @@
+from typing import List, Tuple
+
+from sentiment_service import analyze_sentiments, get_sentiment_model_version
+from emotion_service import detect_emotions, get_emotion_model_version
+
+def model_version_for(emotion_version: str) -> str:
+    """Combine the current sentiment version with the given emotion version"""
+    return f"{get_sentiment_model_version()}|{emotion_version}"
+
+def get_model_version() -> str:
+    """
+    Combined sentiment/emotion model identifier stored on each row, so rows
+    scored under older models or thresholds can be found and re-scored.
+    """
+    return model_version_for(get_emotion_model_version())
+
+def score_texts(texts: List[str]) -> Tuple[List[Tuple[str, str]], str]:
+    """
+    Score a batch of texts, returning (sentiment, emotion) per text and the
+    model version that actually produced them.
+    """
+    emotions, emotion_version = detect_emotions(texts)
+    return list(zip(analyze_sentiments(texts), emotions)), model_version_for(emotion_version)
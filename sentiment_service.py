@@ -1,5 +1,16 @@
+import os
+from typing import List
+
 from textblob import TextBlob
 
+# Polarity above +threshold is Positive, below -threshold is Negative.
+# Changing this invalidates stored labels; run rescore.py afterwards.
+SENTIMENT_THRESHOLD = float(os.getenv("SENTIMENT_THRESHOLD", "0.1"))
+
+def get_sentiment_model_version() -> str:
+    """Identifier for the sentiment model and thresholds currently in use"""
+    return f"textblob@{SENTIMENT_THRESHOLD}"
+
 def analyze_sentiment(text: str) -> str:
     """
     Analyze sentiment using TextBlob.
@@ -11,10 +22,13 @@ def analyze_sentiment(text: str) -> str:
     blob = TextBlob(text)
     polarity = blob.sentiment.polarity
     
-    if polarity > 0.1:
+    if polarity > SENTIMENT_THRESHOLD:
         return "Positive"
-    elif polarity < -0.1:
+    elif polarity < -SENTIMENT_THRESHOLD:
         return "Negative"
     else:
         return "Neutral"
 
+def analyze_sentiments(texts: List[str]) -> List[str]:
+    """Batch version of analyze_sentiment, one label per input text"""
+    return [analyze_sentiment(text) for text in texts]
@@ -0,0 +1,41 @@
+from typing import Iterable, List
+
+from fastapi.responses import ORJSONResponse
+
+from models import RedditPost
+
+# Columns that make up a RedditPostResponse payload. Selecting only these
+# lets /results skip building ORM objects entirely.
+POST_COLUMNS = (
+    RedditPost.id,
+    RedditPost.topic,
+    RedditPost.post_text,
+    RedditPost.sentiment,
+    RedditPost.emotion,
+    RedditPost.created_at,
+)
+
+def post_to_dict(post: RedditPost) -> dict:
+    """
+    Build a RedditPostResponse-shaped dict from a trusted database row,
+    without constructing and validating a Pydantic model per post.
+    """
+    return {
+        "id": post.id,
+        "topic": post.topic,
+        "post_text": post.post_text,
+        "sentiment": post.sentiment,
+        "emotion": post.emotion,
+        "created_at": post.created_at,
+    }
+
+def rows_to_dicts(rows: Iterable) -> List[dict]:
+    """Convert rows selected with POST_COLUMNS into response dicts."""
+    return [row._asdict() for row in rows]
+
+def fast_json_response(content) -> ORJSONResponse:
+    """
+    Encode already-trusted content with orjson, bypassing FastAPI's
+    response_model validation and jsonable_encoder pass.
+    """
+    return ORJSONResponse(content=content)
@@ -0,0 +1,156 @@
+from datetime import date, timedelta
+from typing import Iterable, List, Set, Tuple
+
+import numpy as np
+from sqlalchemy import case, distinct, func, select
+from sqlalchemy.orm import Session
+
+from models import TopicTermCount
+
+# SQLite caps bound parameters per statement, so upserts go in batches
+UPSERT_BATCH_SIZE = 1000
+
+def extract_terms(processed_text: str) -> Set[str]:
+    """
+    Unigrams and bigrams from the output of preprocess_text.
+    Returned as a set so each post counts a term at most once.
+    """
+    tokens = processed_text.split()
+    terms = set(tokens)
+    terms.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    return terms
+
+def _insert_for(db: Session):
+    """Dialect-specific INSERT that supports ON CONFLICT upserts"""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+def update_term_counts(db: Session, topic: str, posts: Iterable[Tuple[date, str, str]]):
+    """
+    Add analyzed posts to the (topic, day, term) count table.
+    `posts` yields (day, processed_text, sentiment). Caller commits.
+    """
+    counts = {}
+    for day, processed_text, sentiment in posts:
+        is_negative = sentiment.lower() == "negative"
+        for term in extract_terms(processed_text):
+            key = (day, term)
+            total, negative = counts.get(key, (0, 0))
+            counts[key] = (total + 1, negative + int(is_negative))
+
+    if not counts:
+        return
+
+    values = [
+        {"topic": topic, "day": day, "term": term, "count": total, "negative_count": negative}
+        for (day, term), (total, negative) in counts.items()
+    ]
+    insert = _insert_for(db)
+    for i in range(0, len(values), UPSERT_BATCH_SIZE):
+        stmt = insert(TopicTermCount).values(values[i:i + UPSERT_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["topic", "day", "term"],
+            set_={
+                "count": TopicTermCount.count + stmt.excluded.count,
+                "negative_count": TopicTermCount.negative_count + stmt.excluded.negative_count,
+            },
+        )
+        db.execute(stmt)
+
+def _log_odds_z(group: np.ndarray, rest: np.ndarray, prior: np.ndarray) -> np.ndarray:
+    """
+    Log-odds ratio with informative Dirichlet prior (Monroe et al., 2008),
+    as z-scores. Positive means the term is over-represented in `group`.
+    """
+    alpha0 = prior.sum()
+    n_group = group.sum()
+    n_rest = rest.sum()
+    # A single-term vocabulary divides by zero; score those terms as 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta = (
+            np.log((group + prior) / (n_group + alpha0 - group - prior))
+            - np.log((rest + prior) / (n_rest + alpha0 - rest - prior))
+        )
+        variance = 1.0 / (group + prior) + 1.0 / (rest + prior)
+        z = delta / np.sqrt(variance)
+    return np.nan_to_num(z, nan=0.0, posinf=0.0, neginf=0.0)
+
+def _top(terms: np.ndarray, counts: np.ndarray, scores: np.ndarray, limit: int) -> List[dict]:
+    order = np.argsort(-scores, kind="stable")[:limit]
+    return [
+        {"term": str(terms[i]), "count": int(counts[i]), "score": round(float(scores[i]), 4)}
+        for i in order
+        if scores[i] > 0
+    ]
+
+def get_term_stats(db: Session, topic: str, days: int = 7, limit: int = 20) -> dict:
+    """
+    Top, rising and negative-associated terms for a topic over the last `days`
+    days, scored from the pre-aggregated counts only.
+
+    - top: TF-IDF, with IDF taken across all topics seen in the window
+    - rising: log-odds z-score of the later half of the window vs the earlier half
+    - negative: log-odds z-score of negative posts vs all other posts
+    """
+    # `days` calendar days ending today; the recent half starts at mid_day
+    # (the later half gets the extra day when `days` is odd)
+    end_day = date.today()
+    start_day = end_day - timedelta(days=days - 1)
+    mid_day = start_day + timedelta(days=days // 2)
+
+    in_window = TopicTermCount.day >= start_day
+    for_topic = TopicTermCount.topic.ilike(f"%{topic}%")
+
+    # Number of topics each of this topic's terms appears in across the
+    # window, for IDF. Restricting to those terms first means only their rows
+    # are grouped (via the term index), not every term of every topic.
+    topic_terms = select(TopicTermCount.term).where(for_topic, in_window).distinct()
+    doc_freq = (
+        select(TopicTermCount.term, func.count(distinct(TopicTermCount.topic)).label("topics"))
+        .where(in_window, TopicTermCount.term.in_(topic_terms))
+        .group_by(TopicTermCount.term)
+        .subquery()
+    )
+    n_topics = db.execute(
+        select(func.count(distinct(TopicTermCount.topic))).where(in_window)
+    ).scalar() or 0
+
+    rows = db.execute(
+        select(
+            TopicTermCount.term,
+            func.sum(TopicTermCount.count),
+            func.sum(TopicTermCount.negative_count),
+            func.sum(case((TopicTermCount.day >= mid_day, TopicTermCount.count), else_=0)),
+            doc_freq.c.topics,
+        )
+        .join(doc_freq, doc_freq.c.term == TopicTermCount.term)
+        .where(for_topic, in_window)
+        .group_by(TopicTermCount.term, doc_freq.c.topics)
+    ).all()
+
+    if not rows:
+        return {"topic": topic, "days": days, "top_terms": [], "rising_terms": [], "negative_terms": []}
+
+    terms = np.array([row[0] for row in rows], dtype=object)
+    stats = np.array([row[1:] for row in rows], dtype=np.float64)
+    total, negative, recent, topic_freq = stats.T
+
+    idf = np.log((1 + n_topics) / (1 + topic_freq)) + 1
+    tfidf = total * idf
+
+    # Prior proportional to overall term frequency, averaging one pseudo-count per term
+    prior = total / total.sum() * len(total)
+    # A one-day window has no earlier half to compare against
+    rising = _log_odds_z(recent, total - recent, prior) if days >= 2 else np.zeros_like(total)
+    negative_z = _log_odds_z(negative, total - negative, prior)
+
+    return {
+        "topic": topic,
+        "days": days,
+        "top_terms": _top(terms, total, tfidf, limit),
+        "rising_terms": _top(terms, recent, rising, limit),
+        "negative_terms": _top(terms, negative, negative_z, limit),
+    }